@@ -1,13 +1,19 @@
 import os
 import sys
-import json
+import asyncio
+import sqlite3
+import functools
 import traceback
 import threading
+import queue
 import time
+from contextlib import asynccontextmanager
+import orjson
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from jdatetime import datetime as jdatetime
+from jinja2 import DictLoader, Environment
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
@@ -20,47 +26,96 @@ else:
     APP_DIR = os.path.dirname(os.path.abspath(__file__))
 
 FILES_DIR = os.path.join(APP_DIR, "files")
-JSON_FILE = os.path.join(APP_DIR, "database.json")
+DB_FILE = os.path.join(APP_DIR, "db.sqlite3")
+# JSON and JSON Lines databases used by earlier versions, imported once into DB_FILE
+LEGACY_JSON_FILE = os.path.join(APP_DIR, "database.json")
+LEGACY_JSONL_FILE = os.path.join(APP_DIR, "database.jsonl")
+
+# Pre-rendered page served at /
+STATIC_DIR = os.path.join(APP_DIR, "static")
+INDEX_FILE = os.path.join(STATIC_DIR, "index.html")
 
 if not os.path.exists(FILES_DIR):
     os.makedirs(FILES_DIR)
     print(f"[INFO] Created files folder at: {FILES_DIR}")
 
+os.makedirs(STATIC_DIR, exist_ok=True)
+
 # -------------------------
 # FastAPI setup
 # -------------------------
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Startup and shutdown. The helpers used here are defined further down.
+    """
+    global _event_loop
+    _event_loop = asyncio.get_running_loop()
+    # The legacy import and first render do blocking I/O, keep them off the loop
+    await asyncio.to_thread(prepare_storage)
+    threading.Thread(target=start_watcher, daemon=True).start()
+    yield
+    close_event_streams()
+
+app = FastAPI(lifespan=lifespan)
 app.mount("/files", StaticFiles(directory=FILES_DIR), name="files")
 
 # -------------------------
 # Call logs processing
 # -------------------------
+TAIL_CHUNK_SIZE = 64 * 1024
+
+def _tail_is_complete(lines):
+    """
+    True when the tail lines hold the whole Telsa64 log block, or when the
+    file can already be rejected without reading any further back.
+    """
+    if not lines or lines[-1].strip() != "Telsa64":
+        return True
+    if len(lines) < 2:
+        return False
+    try:
+        num_lines_to_read = int(lines[-2].strip())
+    except ValueError:
+        return True
+    return len(lines) >= num_lines_to_read + 2
+
 def extract_logs(file_path):
+    """
+    Read only the tail of the file, growing the window until it covers the
+    number of log lines announced before Telsa64.
+    """
     try:
         with open(file_path, 'rb') as f:
-            data = f.read()
-        text = data.decode('utf-8', errors='ignore')
-        return text.splitlines()
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            window = TAIL_CHUNK_SIZE
+            while True:
+                start = max(0, size - window)
+                f.seek(start)
+                data = f.read()
+                lines = data.decode('utf-8', errors='ignore').splitlines()
+                if start == 0:
+                    return lines
+                # The first line may have been cut by the seek
+                lines = lines[1:]
+                if _tail_is_complete(lines):
+                    return lines
+                window *= 2
     except Exception as e:
         print(f"[ERROR] Failed to read or decode {file_path}: {e}")
         traceback.print_exc()
         return []
 
-def parse_log_line(line):
-    try:
-        parts = line.split('|')
-        if len(parts) < 2:
-            return None
-        fields = parts[2:]
-        parsed = {}
-        for field in fields:
-            if ':' in field:
-                key, val = field.split(':', 1)
-                parsed[key] = val
-        return parsed
-    except Exception as e:
-        print(f"[ERROR] Failed to parse line: {line} -- {e}")
-        return None
+def get_log_field(parts, key):
+    """
+    Return the value of the first 'key:value' field of a split log line.
+    """
+    for field in parts[2:]:
+        sep = field.find(':')
+        if sep != -1 and field[:sep] == key:
+            return field[sep + 1:]
+    return None
 
 def process_logs(lines, file_name):
     if not lines or len(lines) < 2:
@@ -79,7 +134,7 @@ def process_logs(lines, file_name):
     start_index = max(0, count_line_index - num_lines_to_read)
     selected_lines = lines[start_index:count_line_index]
 
-    db_entry = {"FileName": file_name, "Info": None, "Info_line": None, "Number": None, "CallWindow": None}
+    db_entry = {"FileName": file_name, "Info_line": None, "Number": None, "CallWindow": None}
 
     for line in selected_lines:
         line = line.strip()
@@ -87,56 +142,377 @@ def process_logs(lines, file_name):
         if len(parts) < 2:
             continue
         line_type = parts[1].strip()
-        parsed = parse_log_line(line)
-        if not parsed:
-            continue
         if line_type == "Info":
-            db_entry["Info"] = parsed
             db_entry["Info_line"] = line
         elif line_type == "Number":
-            db_entry["Number"] = parsed
+            number = get_log_field(parts, "Number")
+            if number is not None:
+                db_entry["Number"] = {"Number": number}
         elif line_type == "CallWindow":
-            db_entry["CallWindow"] = parsed
+            call_type = get_log_field(parts, "Call_Type")
+            if call_type is not None:
+                db_entry["CallWindow"] = {"Call_Type": call_type}
 
     if db_entry["Number"] is None:
         db_entry["Number"] = {"Number": "نامشخص"}
 
     return db_entry
 
-def save_to_json(db_entry):
+@functools.lru_cache(maxsize=4096)
+def _to_shamsi(date_part, time_part):
+    y, m, d = map(int, date_part.split("/"))
+    h, mi, s = map(int, time_part.split(":"))
+    j_date = jdatetime.fromgregorian(year=y, month=m, day=d, hour=h, minute=mi, second=s)
+    return j_date.strftime("%Y/%m/%d"), j_date.strftime("%H:%M:%S")
+
+def convert_info_line_to_shamsi(line):
+    """
+    Convert date from log line (YYYY/MM/DD HH:MM:SS) to Shamsi.
+    """
+    if not line:
+        return "", ""
+    try:
+        pipe = line.find("|")
+        if pipe == -1:
+            pipe = len(line)
+        sp = line.find(" ", 0, pipe)
+        if sp == -1:
+            raise ValueError("missing time part")
+        return _to_shamsi(line[:sp], line[sp + 1:pipe])
+    except Exception as e:
+        print(f"[ERROR] Failed to convert date: {line} -- {e}")
+        return "", ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries(
+    filename TEXT PRIMARY KEY,
+    info_line TEXT,
+    number TEXT,
+    call_type TEXT,
+    ts_date TEXT,
+    ts_time TEXT,
+    number_fa TEXT,
+    call_type_fa TEXT
+)
+"""
+
+# Display columns added after the first SQLite release, with their backfill
+_DISPLAY_COLUMNS = ("number_fa", "call_type_fa")
+
+# PRAGMA user_version once the legacy JSON import has been committed
+LEGACY_IMPORTED = 1
+
+def open_db():
+    conn = sqlite3.connect(DB_FILE, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(_SCHEMA)
+    return conn
+
+# Opened by prepare_storage(), off the event loop
+_db = None
+_db_lock = threading.Lock()
+
+def load_db():
+    """
+    Stream stored rows in insertion order. Uses its own connection, so WAL
+    lets it read while the watcher keeps writing.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield from conn.execute(
+            "SELECT filename, number_fa, call_type_fa, ts_date, ts_time FROM entries ORDER BY rowid"
+        )
+    finally:
+        conn.close()
+
+def display_fields(number, call_type):
+    """
+    Persian-numeral number and Farsi call type, as shown in the table.
+    """
+    return to_persian_numbers(number or "نامشخص"), get_call_type_farsi(call_type)
+
+def upgrade_schema():
+    """
+    Add the display columns to databases created before they existed and
+    fill them in for the rows already stored.
+    """
+    with _db_lock:
+        columns = {row["name"] for row in _db.execute("PRAGMA table_info(entries)")}
+        missing = [c for c in _DISPLAY_COLUMNS if c not in columns]
+        if not missing:
+            return
+        _db.execute("BEGIN")
+        try:
+            for column in missing:
+                _db.execute(f"ALTER TABLE entries ADD COLUMN {column} TEXT")
+            rows = _db.execute("SELECT rowid, number, call_type FROM entries").fetchall()
+            _db.executemany(
+                "UPDATE entries SET number_fa = ?, call_type_fa = ? WHERE rowid = ?",
+                [(*display_fields(r["number"], r["call_type"]), r["rowid"]) for r in rows],
+            )
+            _db.execute("COMMIT")
+        except Exception:
+            _db.execute("ROLLBACK")
+            raise
+    print(f"[INFO] Added display columns to {len(rows)} stored entries")
+
+def to_row(db_entry):
+    """
+    Turn a parsed entry into an entries row, doing all display formatting
+    once here rather than on every render.
+    """
+    file_name = db_entry.get("FileName")
+    if not isinstance(file_name, str) or not file_name:
+        raise ValueError("missing FileName")
+    info_line = db_entry.get("Info_line")
+    number = (db_entry.get("Number") or {}).get("Number")
+    call_type = (db_entry.get("CallWindow") or {}).get("Call_Type")
+    for value in (info_line, number, call_type):
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"unexpected field value {value!r}")
+    ts_date, ts_time = convert_info_line_to_shamsi(info_line)
+    number_fa, call_type_fa = display_fields(number, call_type)
+    return {
+        "filename": file_name,
+        "info_line": info_line,
+        "number": number,
+        "call_type": call_type,
+        "ts_date": ts_date,
+        "ts_time": ts_time,
+        "number_fa": number_fa,
+        "call_type_fa": call_type_fa,
+    }
+
+def insert_entries(db_entries, user_version=None, keep_rows=True):
+    """
+    Insert parsed entries in a single transaction. Returns (count, rows) for
+    the entries that were not already stored, or None if the transaction
+    failed. rows stays empty unless keep_rows is set. Malformed entries are
+    logged and skipped. A given user_version is stored in the same
+    transaction.
+    """
+    count = 0
+    rows = []
+    try:
+        with _db_lock:
+            _db.execute("BEGIN")
+            try:
+                # Position in the rendered table, which numbers rows 1..N
+                position = _db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                for db_entry in db_entries:
+                    try:
+                        row = to_row(db_entry)
+                    except Exception as e:
+                        print(f"[ERROR] Skipping malformed entry {db_entry!r:.200}: {e}")
+                        continue
+                    cur = _db.execute(
+                        "INSERT OR IGNORE INTO entries"
+                        "(filename, info_line, number, call_type, ts_date, ts_time, number_fa, call_type_fa) "
+                        "VALUES (:filename, :info_line, :number, :call_type, :ts_date, :ts_time, :number_fa, :call_type_fa)",
+                        row,
+                    )
+                    if cur.rowcount == 0:
+                        continue
+                    count += 1
+                    position += 1
+                    if keep_rows:
+                        row["index"] = position
+                        rows.append(row)
+                if user_version is not None:
+                    _db.execute(f"PRAGMA user_version = {int(user_version)}")
+                _db.execute("COMMIT")
+            except Exception:
+                _db.execute("ROLLBACK")
+                raise
+    except Exception as e:
+        print(f"[ERROR] Failed to save entries to database: {e}")
+        traceback.print_exc()
+        return None
+    return count, rows
+
+def save_entries(db_entries):
+    """
+    Insert a batch of parsed entries and return the newly stored ones as
+    table rows, or None if the batch could not be saved.
+    """
+    result = insert_entries(db_entries)
+    if result is None:
+        return None
+    _, rows = result
+    for row in rows:
+        print(f"[INFO] Saved entry for {row['filename']}")
+    return rows
+
+# Parsed entries are written in batches: after BATCH_DELAY seconds, or as
+# soon as BATCH_SIZE entries are waiting, whichever comes first
+BATCH_SIZE = 32
+BATCH_DELAY = 0.5
+
+_pending = []
+_pending_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_flush_timer = None
+
+# File names already stored or waiting in _pending, loaded once at startup
+_seen_filenames = set()
+
+def load_seen_filenames():
+    conn = sqlite3.connect(DB_FILE)
     try:
-        if os.path.exists(JSON_FILE):
-            with open(JSON_FILE, 'r', encoding='utf-8') as f:
-                db = json.load(f)
-        else:
-            db = []
-
-        if not any(e.get("FileName") == db_entry.get("FileName") for e in db):
-            db.append(db_entry)
-            with open(JSON_FILE, 'w', encoding='utf-8') as f:
-                json.dump(db, f, indent=4, ensure_ascii=False)
-            print(f"[INFO] Saved entry for {db_entry.get('FileName')}")
+        _seen_filenames.update(name for (name,) in conn.execute("SELECT filename FROM entries"))
+    finally:
+        conn.close()
+
+def queue_entry(db_entry):
+    global _flush_timer
+    file_name = db_entry.get("FileName")
+    if file_name in _seen_filenames:
+        return
+    _seen_filenames.add(file_name)
+    with _pending_lock:
+        _pending.append(db_entry)
+        flush_now = len(_pending) >= BATCH_SIZE
+        if not flush_now and _flush_timer is None:
+            _flush_timer = threading.Timer(BATCH_DELAY, flush_entries)
+            _flush_timer.start()
+    if flush_now:
+        flush_entries()
+
+def flush_entries():
+    global _flush_timer
+    with _flush_lock:
+        with _pending_lock:
+            batch = _pending[:]
+            _pending.clear()
+            if _flush_timer is not None:
+                _flush_timer.cancel()
+                _flush_timer = None
+        if not batch:
+            return
+        rows = save_entries(batch)
+        if rows is None:
+            # Not stored, so let a later event for these files retry them
+            _seen_filenames.difference_update(e.get("FileName") for e in batch)
+            return
+        if rows:
+            render_page()
+            for row in rows:
+                publish_row(row)
+
+def read_legacy_entries():
+    """
+    Entries from the old database.json array and database.jsonl lines, in
+    that order. Raises if a file that exists cannot be read.
+    """
+    entries = []
+    if os.path.exists(LEGACY_JSON_FILE):
+        with open(LEGACY_JSON_FILE, 'rb') as f:
+            entries.extend(orjson.loads(f.read()))
+    if os.path.exists(LEGACY_JSONL_FILE):
+        with open(LEGACY_JSONL_FILE, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(orjson.loads(line))
+                except orjson.JSONDecodeError as e:
+                    # An append interrupted by a crash leaves a partial last line
+                    print(f"[ERROR] Skipping corrupt line in {LEGACY_JSONL_FILE}: {e}")
+    return entries
+
+def import_legacy_db():
+    """
+    Copy entries from the old database.json / database.jsonl into the
+    database, once. The import is only marked done when it commits, so an
+    interrupted import is retried on the next start.
+    """
+    with _db_lock:
+        if _db.execute("PRAGMA user_version").fetchone()[0] >= LEGACY_IMPORTED:
+            return
+    try:
+        entries = read_legacy_entries()
     except Exception as e:
-        print(f"[ERROR] Failed to save JSON database: {e}")
+        print(f"[ERROR] Failed to read legacy JSON database: {e}")
         traceback.print_exc()
+        return
+    # Counted rather than collected and logged one by one: this can be a
+    # very large history
+    result = insert_entries(entries, user_version=LEGACY_IMPORTED, keep_rows=False)
+    if result is None:
+        print("[ERROR] Legacy import failed, it will be retried on the next start")
+    elif entries:
+        print(f"[INFO] Imported {result[0]} of {len(entries)} legacy entries")
 
 def process_file(file_path):
+    file_name = os.path.basename(file_path)
+    if file_name in _seen_filenames:
+        return
+    print(f"[INFO] New file detected: {file_path}")
     lines = extract_logs(file_path)
-    db_entry = process_logs(lines, os.path.basename(file_path))
+    db_entry = process_logs(lines, file_name)
     if db_entry:
-        save_to_json(db_entry)
+        queue_entry(db_entry)
 
 # -------------------------
 # Watchdog file monitoring
 # -------------------------
+# Wait after the last created/modified event, for platforms without close events
+SETTLE_SECONDS = 1.0
+# Window used to coalesce repeated events for the same file
+COALESCE_SECONDS = 0.2
+
+_AUDIO_EXTS = ('.mp3', '.wav')
+
+_file_events = queue.Queue()
+
 class FileHandler(FileSystemEventHandler):
+    def _enqueue(self, event, delay):
+        # Both extensions are 4 characters, so only the suffix needs lowercasing
+        if not event.is_directory and event.src_path[-4:].lower() in _AUDIO_EXTS:
+            _file_events.put((event.src_path, time.monotonic() + delay))
+
     def on_created(self, event):
-        if not event.is_directory and event.src_path.lower().endswith(('.mp3', '.wav')):
-            print(f"[INFO] New file detected: {event.src_path}")
-            time.sleep(1)
-            process_file(event.src_path)
+        self._enqueue(event, SETTLE_SECONDS)
+
+    def on_modified(self, event):
+        self._enqueue(event, SETTLE_SECONDS)
+
+    def on_closed(self, event):
+        # Only reported by the inotify backend, once the writer closed the file
+        self._enqueue(event, COALESCE_SECONDS)
+
+def file_worker():
+    """
+    Process queued files once no new event arrived for them within their
+    settle window, so a burst of events for one file runs process_file once.
+    """
+    pending = {}
+    while True:
+        timeout = None
+        if pending:
+            timeout = max(0, min(pending.values()) - time.monotonic())
+        try:
+            path, due = _file_events.get(timeout=timeout)
+            pending[path] = due
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        for path, due in list(pending.items()):
+            if due > now:
+                continue
+            del pending[path]
+            try:
+                process_file(path)
+            except Exception as e:
+                print(f"[ERROR] Failed to process {path}: {e}")
+                traceback.print_exc()
 
 def start_watcher():
+    threading.Thread(target=file_worker, daemon=True).start()
     observer = Observer()
     observer.schedule(FileHandler(), FILES_DIR, recursive=False)
     observer.start()
@@ -147,97 +523,57 @@ def start_watcher():
         observer.stop()
     observer.join()
 
-threading.Thread(target=start_watcher, daemon=True).start()
-
 # -------------------------
 # Web interface helpers
 # -------------------------
-def convert_info_line_to_shamsi(line):
-    """
-    Convert date from log line (YYYY/MM/DD HH:MM:SS) to Shamsi.
-    """
-    if not line:
-        return "", ""
-    try:
-        date_part, time_part = line.split("|")[0].split(" ")
-        y, m, d = map(int, date_part.split("/"))
-        h, mi, s = map(int, time_part.split(":"))
-        j_date = jdatetime.fromgregorian(year=y, month=m, day=d, hour=h, minute=mi, second=s)
-        return j_date.strftime("%Y/%m/%d"), j_date.strftime("%H:%M:%S")
-    except Exception as e:
-        print(f"[ERROR] Failed to convert date: {line} -- {e}")
-        return "", ""
-
-def get_call_type_farsi(callwindow):
-    if not callwindow:
+_CALL_TYPE_MAP = {
+    "voice_call": "تماس صوتی",
+    "null": "نامشخص",
+    "video_call": "تماس ویدیویی",
+}
+
+def get_call_type_farsi(call_type):
+    if not call_type:
         return ""
-    call_type = callwindow.get("Call_Type", "").lower()
-    mapping = {
-        "voice_call": "تماس صوتی",
-        "null": "نامشخص",
-        "video_call": "تماس ویدیویی",
-    }
-    return mapping.get(call_type, call_type)
+    call_type = call_type.lower()
+    return _CALL_TYPE_MAP.get(call_type, call_type)
+
+_PERSIAN_TABLE = str.maketrans("0123456789", "۰۱۲۳۴۵۶۷۸۹")
 
 def to_persian_numbers(s):
-    persian_digits = "۰۱۲۳۴۵۶۷۸۹"
-    return "".join(persian_digits[int(c)] if c.isdigit() else c for c in str(s))
-
-def parse_entry(entry, index):
-    number_value = entry.get("Number", {}).get("Number", "نامشخص")
-    info_line = entry.get("Info_line")
-    date_shamsi, time_shamsi = convert_info_line_to_shamsi(info_line)
-    call_type_farsi = get_call_type_farsi(entry.get("CallWindow"))
-    file_name = entry.get("FileName", "")
-    audio_path = f"/files/{file_name}" if file_name else ""
-
-    return f"""
-    <tr>
-        <td>{to_persian_numbers(index)}</td>
-        <td>{to_persian_numbers(number_value)}</td>
-        <td>{call_type_farsi}</td>
-        <td>{date_shamsi}</td>
-        <td>{time_shamsi}</td>
-        <td>{f'<audio controls src="{audio_path}"></audio>' if audio_path else 'بدون فایل'}</td>
-    </tr>
-    """
+    return str(s).translate(_PERSIAN_TABLE)
 
 # -------------------------
-# FastAPI route
+# Static page rendering
 # -------------------------
-@app.get("/", response_class=HTMLResponse)
-async def index():
-    if os.path.exists(JSON_FILE):
-        with open(JSON_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = []
-
-    rows_html = ""
-    for idx, entry in enumerate(data, start=1):
-        rows_html += parse_entry(entry, idx)
-
-    html = f"""<!DOCTYPE html>
+_ROW_SRC = """{% macro row(entry, index) -%}
+<tr><td>{{ index|persian }}</td><td>{{ entry.number_fa }}</td><td>{{ entry.call_type_fa }}</td><td>{{ entry.ts_date }}</td><td>{{ entry.ts_time }}</td><td>
+{%- if entry.filename %}<audio controls src="/files/{{ entry.filename|urlencode }}"></audio>{% else %}بدون فایل{% endif -%}
+</td></tr>
+{% endmacro %}"""
+
+_PAGE_SRC = """{% from "row.html" import row -%}
+<!DOCTYPE html>
 <html lang="fa">
 <head>
 <meta charset="UTF-8">
 <title>لیست مکالمات</title>
 <style>
-@font-face {{
+@font-face {
     font-family: 'Vazirmatn';
     src: url('https://cdn.jsdelivr.net/gh/rastikerdar/vazirmatn@v33.003/Round-Dots/fonts/webfonts/Vazirmatn-RD[wght].woff2') format('woff2 supports variations');
     font-weight: 100 900;
     font-style: normal;
     font-display: swap;
-}}
-body {{
+}
+body {
     background-color: #121212;
     color: #e0e0e0;
     font-family: 'Vazirmatn';
     direction: rtl;
     margin: 20px;
-}}
-table {{
+}
+table {
     border-collapse: separate;
     border-radius: 10px;
     border: 2px solid gray;
@@ -247,35 +583,35 @@ table {{
     width: 100%;
     background-color: #1e1e1e;
     margin: 0 auto;
-}}
-th, td {{
+}
+th, td {
     border: 1px solid #333;
     padding: 8px 20px;
     text-align: center;
     vertical-align: top;
-}}
-th {{
+}
+th {
     background-color: #2c2c2c;
     cursor: pointer;
-}}
-tr:nth-child(even) {{
+}
+tr:nth-child(even) {
     background-color: #2a2a2a;
-}}
-tr:hover {{
+}
+tr:hover {
     background-color: #333;
-}}
-audio {{
+}
+audio {
     width: 500px;
     height: 35px;
-}}
-h1 {{
+}
+h1 {
     text-align: center;
-}}
-.controls {{
+}
+.controls {
     text-align: center;
     margin-bottom: 12px;
-}}
-.btn {{
+}
+.btn {
     display: inline-block;
     padding: 8px 14px;
     margin: 0 6px;
@@ -284,8 +620,8 @@ h1 {{
     color: #e0e0e0;
     border: 1px solid #3a3a3a;
     cursor: pointer;
-}}
-.btn:active {{ transform: translateY(1px); }}
+}
+.btn:active { transform: translateY(1px); }
 </style>
 </head>
 <body>
@@ -308,25 +644,25 @@ h1 {{
 </tr>
 </thead>
 <tbody>
-{rows_html}
+{% for entry in entries %}{{ row(entry, loop.index) }}{% endfor %}
 </tbody>
 </table>
 
 <script>
-document.querySelectorAll("th.sortable").forEach((th, index) => {{
-    th.addEventListener("click", () => {{
+document.querySelectorAll("th.sortable").forEach((th, index) => {
+    th.addEventListener("click", () => {
         const table = th.closest("table");
         const tbody = table.querySelector("tbody");
         const rows = Array.from(tbody.querySelectorAll("tr"));
         const ascending = !th.classList.contains("asc");
 
-        rows.sort((a, b) => {{
+        rows.sort((a, b) => {
             const aText = a.children[index+1].textContent.trim();
             const bText = b.children[index+1].textContent.trim();
             const aVal = isNaN(aText) ? aText.toLowerCase() : parseFloat(aText);
             const bVal = isNaN(bText) ? bText.toLowerCase() : parseFloat(bText);
             return ascending ? (aVal > bVal ? 1 : -1) : (aVal < bVal ? 1 : -1);
-        }});
+        });
 
         document.querySelectorAll("th").forEach(th => th.classList.remove("asc", "desc"));
         th.classList.toggle("asc", ascending);
@@ -334,54 +670,194 @@ document.querySelectorAll("th.sortable").forEach((th, index) => {{
 
         tbody.innerHTML = "";
         rows.forEach(row => tbody.appendChild(row));
-    }});
-}});
+    });
+});
 
 let _isPlayingSequential = false;
 
-function playOne(audioEl) {{
-    return new Promise((resolve) => {{
-        function cleanup() {{
+function playOne(audioEl) {
+    return new Promise((resolve) => {
+        function cleanup() {
             audioEl.removeEventListener('ended', onEnded);
             audioEl.removeEventListener('pause', onPause);
-        }}
-        function onEnded() {{ cleanup(); resolve(); }}
-        function onPause() {{ cleanup(); resolve(); }}
+        }
+        function onEnded() { cleanup(); resolve(); }
+        function onPause() { cleanup(); resolve(); }
         audioEl.currentTime = 0;
         audioEl.play().catch(() => resolve());
         audioEl.addEventListener('ended', onEnded);
         audioEl.addEventListener('pause', onPause);
-    }});
-}}
+    });
+}
 
-async function playAllSequential() {{
+async function playAllSequential() {
     if (_isPlayingSequential) return;
     _isPlayingSequential = true;
     const audios = Array.from(document.querySelectorAll('tbody tr audio'));
-    for (const a of audios) {{
+    for (const a of audios) {
         if (!_isPlayingSequential) break;
-        document.querySelectorAll('audio').forEach(x => {{ if (x !== a) x.pause(); }});
+        document.querySelectorAll('audio').forEach(x => { if (x !== a) x.pause(); });
         await playOne(a);
-    }}
+    }
     _isPlayingSequential = false;
-}}
+}
 
-function stopAll() {{
+function stopAll() {
     _isPlayingSequential = false;
-    document.querySelectorAll('audio').forEach(a => {{ a.pause(); a.currentTime = 0; }});
-}}
+    document.querySelectorAll('audio').forEach(a => { a.pause(); a.currentTime = 0; });
+}
 
 document.getElementById('playAllBtn').addEventListener('click', playAllSequential);
 document.getElementById('stopBtn').addEventListener('click', stopAll);
+
+const events = new EventSource('/events');
+events.onmessage = (e) => {
+    const row = JSON.parse(e.data);
+    const tbody = document.querySelector('#recordTable tbody');
+    if (row.index !== tbody.rows.length + 1) {
+        // Rows were added between rendering this page and connecting
+        location.reload();
+        return;
+    }
+    tbody.insertAdjacentHTML('beforeend', row.html);
+};
 </script>
 </body>
 </html>
 """
-    return HTMLResponse(content=html)
+
+_jinja_env = Environment(
+    loader=DictLoader({"row.html": _ROW_SRC, "index.html": _PAGE_SRC}),
+    autoescape=True,
+    keep_trailing_newline=True,
+)
+_jinja_env.filters["persian"] = to_persian_numbers
+# Compiled once; dynamic fields are HTML-escaped by autoescape
+_PAGE_TPL = _jinja_env.get_template("index.html")
+_ROW_MACRO = _jinja_env.get_template("row.html").module.row
+
+def render_row(row, index):
+    return str(_ROW_MACRO(row, index))
+
+# Delay before re-rendering when INDEX_FILE could not be replaced
+RENDER_RETRY_DELAY = 2.0
+
+_render_lock = threading.Lock()
+_render_retry = None
+
+def render_page():
+    """
+    Write the full page to INDEX_FILE, replacing the previous one atomically.
+    Rows are written as they are read, so the page is never held in memory.
+    """
+    global _render_retry
+    with _render_lock:
+        if _render_retry is not None:
+            _render_retry.cancel()
+            _render_retry = None
+        try:
+            tmp_file = INDEX_FILE + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.writelines(_PAGE_TPL.generate(entries=load_db()))
+            os.replace(tmp_file, INDEX_FILE)
+        except PermissionError as e:
+            # Windows refuses to replace index.html while it is being sent to
+            # a browser, so render again shortly instead of keeping the old page
+            print(f"[INFO] {INDEX_FILE} is busy, retrying in {RENDER_RETRY_DELAY}s: {e}")
+            _render_retry = threading.Timer(RENDER_RETRY_DELAY, render_page)
+            _render_retry.daemon = True
+            _render_retry.start()
+        except Exception as e:
+            print(f"[ERROR] Failed to render {INDEX_FILE}: {e}")
+            traceback.print_exc()
+
+# -------------------------
+# Live updates (Server-Sent Events)
+# -------------------------
+_event_loop = None
+_subscribers = set()
+# Pushed to subscriber queues to end their streams on shutdown
+_CLOSE_STREAM = None
+_streams_closed = False
+
+def _broadcast(payload):
+    for q in _subscribers:
+        q.put_nowait(payload)
+
+def broadcast_threadsafe(payload):
+    """
+    Feed payload to every subscriber queue from any thread. Does nothing if
+    the event loop is not running yet or has already been closed.
+    """
+    if _event_loop is None:
+        return
+    try:
+        _event_loop.call_soon_threadsafe(_broadcast, payload)
+    except RuntimeError:
+        # The loop closed during shutdown
+        pass
+
+def publish_row(row):
+    """
+    Push a newly saved row to every connected browser. Called from the
+    watcher thread, so the queues are fed on the event loop.
+    """
+    payload = orjson.dumps({"index": row["index"], "html": render_row(row, row["index"])}).decode()
+    broadcast_threadsafe(payload)
+
+def close_event_streams():
+    """
+    End every open /events stream. Without this, uvicorn waits on them
+    forever when asked to shut down.
+    """
+    global _streams_closed
+    _streams_closed = True
+    broadcast_threadsafe(_CLOSE_STREAM)
+
+@app.get("/events")
+async def events():
+    async def stream():
+        if _streams_closed:
+            return
+        q = asyncio.Queue()
+        _subscribers.add(q)
+        try:
+            while True:
+                payload = await q.get()
+                if payload is _CLOSE_STREAM:
+                    return
+                yield f"data: {payload}\n\n"
+        finally:
+            _subscribers.discard(q)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+# -------------------------
+# Startup
+# -------------------------
+def prepare_storage():
+    global _db
+    _db = open_db()
+    upgrade_schema()
+    import_legacy_db()
+    load_seen_filenames()
+    render_page()
+
+# Mounted last so it does not shadow the routes above
+app.mount("/", StaticFiles(directory=STATIC_DIR, html=True), name="static")
 
 # -------------------------
 # Run FastAPI
 # -------------------------
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8001, reload=False)
+
+    class Server(uvicorn.Server):
+        # uvicorn only runs shutdown hooks after open connections have
+        # closed, so the SSE streams are ended as soon as Ctrl-C arrives
+        def handle_exit(self, sig, frame):
+            close_event_streams()
+            super().handle_exit(sig, frame)
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=8001, reload=False, timeout_graceful_shutdown=5)
+    Server(config).run()